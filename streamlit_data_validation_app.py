@@ -1,355 +1,28 @@
 # Snowflake Data Lineage Streamlit App
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import networkx as nx
+import xlsxwriter
+import openpyxl
 from snowflake.snowpark.context import get_active_session
 import streamlit.components.v1 as components
 from pyvis.network import Network
-import tempfile
-import os
 import json
+import time
+import threading
 from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Initialize session
 session = get_active_session()
 
-# =============================================================================
-# UTILITY FUNCTIONS FOR DATABASE/SCHEMA/OBJECT OPERATIONS
-# =============================================================================
-
-def get_all_databases(session):
-    """Get all available databases"""
-    try:
-        query = "SHOW DATABASES"
-        databases_df = session.sql(query).to_pandas()
-        
-        # Check for different possible column names (including quoted versions)
-        possible_columns = ['"name"', 'name', 'NAME', '"NAME"', 'database_name', 'DATABASE_NAME', 
-                          '"database_name"', '"DATABASE_NAME"']
-        
-        for col in possible_columns:
-            if col in databases_df.columns:
-                return sorted(databases_df[col].tolist())
-        
-        # If none of the expected columns exist, show what columns are available
-        st.error(f"Unexpected column names in SHOW DATABASES result: {list(databases_df.columns)}")
-        # Try to use the first column as database name
-        if len(databases_df.columns) > 0:
-            return sorted(databases_df.iloc[:, 0].tolist())
-        return []
-    except Exception as e:
-        st.error(f"Error getting databases: {str(e)}")
-        return []
-
-def get_all_schemas(session, database):
-    """Get all schemas in a database"""
-    try:
-        query = f"SHOW SCHEMAS IN DATABASE {database}"
-        schemas_df = session.sql(query).to_pandas()
-        
-        # Check for different possible column names (including quoted versions)
-        possible_columns = ['"name"', 'name', 'NAME', '"NAME"', 'schema_name', 'SCHEMA_NAME', 
-                          '"schema_name"', '"SCHEMA_NAME"']
-        
-        for col in possible_columns:
-            if col in schemas_df.columns:
-                return sorted(schemas_df[col].tolist())
-        
-        # If none of the expected columns exist, show what columns are available
-        st.error(f"Unexpected column names in SHOW SCHEMAS result: {list(schemas_df.columns)}")
-        # Try to use the first column as schema name
-        if len(schemas_df.columns) > 0:
-            return sorted(schemas_df.iloc[:, 0].tolist())
-        return []
-    except Exception as e:
-        st.error(f"Error getting schemas from {database}: {str(e)}")
-        return []
-
-def get_objects(session, database_name: str, schema_name: str, object_type: str = "ALL"):
-    """Get list of tables, views, or all objects in a schema"""
-    try:
-        if object_type == "TABLE":
-            query = f"""
-            SELECT TABLE_NAME, 'TABLE' as OBJECT_TYPE
-            FROM {database_name}.INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_SCHEMA = '{schema_name}' 
-            AND TABLE_TYPE = 'BASE TABLE'
-            ORDER BY TABLE_NAME
-            """
-        elif object_type == "VIEW":
-            query = f"""
-            SELECT TABLE_NAME, 'VIEW' as OBJECT_TYPE
-            FROM {database_name}.INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_SCHEMA = '{schema_name}' 
-            AND TABLE_TYPE = 'VIEW'
-            ORDER BY TABLE_NAME
-            """
-        else:  # ALL
-            query = f"""
-            SELECT TABLE_NAME, TABLE_TYPE as OBJECT_TYPE
-            FROM {database_name}.INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_SCHEMA = '{schema_name}' 
-            AND TABLE_TYPE IN ('BASE TABLE', 'VIEW')
-            ORDER BY TABLE_NAME
-            """
-        
-        result_df = session.sql(query).to_pandas()
-        if not result_df.empty:
-            # Map BASE TABLE to TABLE for consistency
-            result_df['OBJECT_TYPE'] = result_df['OBJECT_TYPE'].replace('BASE TABLE', 'TABLE')
-            return result_df
-        return pd.DataFrame(columns=['TABLE_NAME', 'OBJECT_TYPE'])
-    except Exception as e:
-        st.error(f"Error fetching objects: {e}")
-        return pd.DataFrame(columns=['TABLE_NAME', 'OBJECT_TYPE'])
-
-def get_object_type(session, db_name: str, schema_name: str, object_name: str):
-    """Determines if the given object is a TABLE or a VIEW"""
-    try:
-        table_type_query = f"""
-        SELECT TABLE_TYPE
-        FROM {db_name}.INFORMATION_SCHEMA.TABLES
-        WHERE TABLE_SCHEMA = '{schema_name}' 
-        AND TABLE_NAME = '{object_name}'
-        """
-        table_result_df = session.sql(table_type_query).to_pandas()
-
-        if not table_result_df.empty:
-            table_type = table_result_df['TABLE_TYPE'].iloc[0]
-            if table_type == 'BASE TABLE':
-                return 'TABLE'
-            elif table_type == 'VIEW':
-                return 'VIEW'
-        return None
-    except Exception as e:
-        st.warning(f"Could not determine object type: {e}")
-        return None
-
-# =============================================================================
-# LINEAGE ANALYSIS FUNCTIONS
-# =============================================================================
-
-def get_lineage_for_single_object(session, object_full_name: str, max_distance: int):
-    """Retrieves lineage for a single Snowflake object using SNOWFLAKE.CORE.GET_LINEAGE"""
-    parts = object_full_name.strip().split('.')
-    
-    # Parse the object name
-    if len(parts) == 3:
-        db_name, schema_name, obj_name = parts[0].upper(), parts[1].upper(), parts[2].upper()
-    elif len(parts) == 2:
-        schema_name, obj_name = parts[0].upper(), parts[1].upper()
-        current_db = session.get_current_database()
-        if current_db:
-            db_name = current_db.upper()
-        else:
-            st.error("Could not determine current database. Please provide full 'DATABASE.SCHEMA.OBJECT_NAME'.")
-            return None, None, None
-    else:
-        st.error("Please enter object name in 'SCHEMA.OBJECT_NAME' or 'DATABASE.SCHEMA.OBJECT_NAME' format.")
-        return None, None, None
-
-    # Determine object type
-    object_type = get_object_type(session, db_name, schema_name, obj_name)
-    if object_type is None:
-        st.error(f"Could not determine if '{object_full_name}' is a TABLE or VIEW, or object does not exist.")
-        return None, None, None
-
-    fully_qualified_object_name = f"{db_name}.{schema_name}.{obj_name}"
-
-    # Query for UPSTREAM dependencies
-    upstream_query = f"""
-    SELECT
-        DISTANCE,
-        SOURCE_OBJECT_DOMAIN,
-        SOURCE_OBJECT_DATABASE,
-        SOURCE_OBJECT_SCHEMA,
-        SOURCE_OBJECT_NAME,
-        TARGET_OBJECT_DOMAIN,
-        TARGET_OBJECT_DATABASE,
-        TARGET_OBJECT_SCHEMA,
-        TARGET_OBJECT_NAME
-    FROM TABLE (SNOWFLAKE.CORE.GET_LINEAGE(
-        '{fully_qualified_object_name}',
-        '{object_type}',
-        'UPSTREAM',
-        {max_distance}
-    ))
-    ORDER BY DISTANCE, SOURCE_OBJECT_NAME
-    """
-
-    # Query for DOWNSTREAM dependencies
-    downstream_query = f"""
-    SELECT
-        DISTANCE,
-        SOURCE_OBJECT_DOMAIN,
-        SOURCE_OBJECT_DATABASE,
-        SOURCE_OBJECT_SCHEMA,
-        SOURCE_OBJECT_NAME,
-        TARGET_OBJECT_DOMAIN,
-        TARGET_OBJECT_DATABASE,
-        TARGET_OBJECT_SCHEMA,
-        TARGET_OBJECT_NAME
-    FROM TABLE (SNOWFLAKE.CORE.GET_LINEAGE(
-        '{fully_qualified_object_name}',
-        '{object_type}',
-        'DOWNSTREAM',
-        {max_distance}
-    ))
-    ORDER BY DISTANCE, TARGET_OBJECT_NAME
-    """
-
-    try:
-        upstream_df = session.sql(upstream_query).to_pandas()
-        downstream_df = session.sql(downstream_query).to_pandas()
-        return upstream_df, downstream_df, object_type
-    except Exception as e:
-        st.error(f"Error fetching lineage: {e}")
-        st.info("Ensure you have ACCOUNTADMIN role or necessary privileges for SNOWFLAKE.CORE functions.")
-        return None, None, None
-
-def get_lineage_for_multiple_objects(session, object_names: list, max_distance: int):
-    """Retrieves lineage for multiple Snowflake objects and consolidates results"""
-    all_lineage_data = []
-    failed_objects = []
-    processed_count = 0
-    total_count = len(object_names)
-
-    # Create progress tracking
-    progress_container = st.container()
-    with progress_container:
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-    for obj_name in object_names:
-        processed_count += 1
-        obj_name = obj_name.strip().upper()
-        
-        # Update progress
-        progress_bar.progress(processed_count / total_count)
-        status_text.text(f"Processing lineage for: {obj_name} ({processed_count}/{total_count})")
-        
-        parts = obj_name.split('.')
-        
-        if len(parts) == 3:
-            db_name, schema_name, current_obj_name = parts[0], parts[1], parts[2]
-        elif len(parts) == 2:
-            schema_name, current_obj_name = parts[0], parts[1]
-            current_db = session.get_current_database()
-            if current_db:
-                db_name = current_db.upper()
-            else:
-                st.warning(f"Skipping '{obj_name}': Could not determine current database.")
-                failed_objects.append(obj_name)
-                continue
-        else:
-            st.warning(f"Skipping '{obj_name}': Invalid format.")
-            failed_objects.append(obj_name)
-            continue
-
-        object_type = get_object_type(session, db_name, schema_name, current_obj_name)
-        if object_type is None:
-            st.warning(f"Skipping '{obj_name}': Could not determine object type.")
-            failed_objects.append(obj_name)
-            continue
-
-        fully_qualified_object_name = f"{db_name}.{schema_name}.{current_obj_name}"
-
-        # Combined query for both upstream and downstream
-        combined_query = f"""
-        SELECT
-            '{obj_name}' AS QUERIED_OBJECT,
-            'UPSTREAM' AS LINEAGE_DIRECTION,
-            DISTANCE,
-            SOURCE_OBJECT_DOMAIN,
-            SOURCE_OBJECT_DATABASE,
-            SOURCE_OBJECT_SCHEMA,
-            SOURCE_OBJECT_NAME,
-            TARGET_OBJECT_DOMAIN,
-            TARGET_OBJECT_DATABASE,
-            TARGET_OBJECT_SCHEMA,
-            TARGET_OBJECT_NAME
-        FROM TABLE (SNOWFLAKE.CORE.GET_LINEAGE(
-            '{fully_qualified_object_name}',
-            '{object_type}',
-            'UPSTREAM',
-            {max_distance}
-        ))
-        UNION ALL
-        SELECT
-            '{obj_name}' AS QUERIED_OBJECT,
-            'DOWNSTREAM' AS LINEAGE_DIRECTION,
-            DISTANCE,
-            SOURCE_OBJECT_DOMAIN,
-            SOURCE_OBJECT_DATABASE,
-            SOURCE_OBJECT_SCHEMA,
-            SOURCE_OBJECT_NAME,
-            TARGET_OBJECT_DOMAIN,
-            TARGET_OBJECT_DATABASE,
-            TARGET_OBJECT_SCHEMA,
-            TARGET_OBJECT_NAME
-        FROM TABLE (SNOWFLAKE.CORE.GET_LINEAGE(
-            '{fully_qualified_object_name}',
-            '{object_type}',
-            'DOWNSTREAM',
-            {max_distance}
-        ))
-        ORDER BY LINEAGE_DIRECTION, DISTANCE
-        """
-
-        try:
-            lineage_df = session.sql(combined_query).to_pandas()
-            if not lineage_df.empty:
-                all_lineage_data.append(lineage_df)
-        except Exception as e:
-            st.warning(f"Error fetching lineage for '{obj_name}': {e}")
-            failed_objects.append(obj_name)
-
-    # Clear progress
-    progress_container.empty()
-
-    if all_lineage_data:
-        combined_df = pd.concat(all_lineage_data, ignore_index=True)
-    else:
-        combined_df = pd.DataFrame()
-
-    return combined_df, failed_objects
-
-# =============================================================================
-# VISUALIZATION FUNCTIONS
-# =============================================================================
-
-
-
-def display_lineage_summary(upstream_df: pd.DataFrame, downstream_df: pd.DataFrame):
-    """Display summary statistics for lineage analysis"""
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("🔼 Upstream Objects", len(upstream_df['SOURCE_OBJECT_NAME'].unique()) if not upstream_df.empty else 0)
-    
-    with col2:
-        st.metric("🔽 Downstream Objects", len(downstream_df['TARGET_OBJECT_NAME'].unique()) if not downstream_df.empty else 0)
-    
-    with col3:
-        max_upstream_distance = upstream_df['DISTANCE'].max() if not upstream_df.empty else 0
-        st.metric("📏 Max Upstream Distance", max_upstream_distance)
-    
-    with col4:
-        max_downstream_distance = downstream_df['DISTANCE'].max() if not downstream_df.empty else 0
-        st.metric("📏 Max Downstream Distance", max_downstream_distance)
-
-# =============================================================================
-# STREAMLIT UI CONFIGURATION
-# =============================================================================
-
-st.set_page_config(
-    page_title="Snowflake Data Lineage Tool", 
-    layout="wide", 
-    initial_sidebar_state="expanded",
-    page_icon="🔄"
-)
-
 # Custom CSS for clean, professional styling
-st.markdown("""
+CSS_STYLE = """
 <style>
     /* Main container styling */
     .main > div {
@@ -542,16 +215,729 @@ st.markdown("""
         background: linear-gradient(180deg, #f8f9fa 0%, #e9ecef 100%) !important;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Static page fragments, each emitted with a single st.markdown call
+PAGE_HEADER = """# Snowflake Data Lineage Tool
+
+<p class="subtitle"></p>
+"""
+
+NAV_SINGLE_SELECTION = """<div class="nav-header">OBJECT SELECTION</div>
+
+### 🎯Select Object Details
+"""
+
+NAV_SINGLE_RESULTS = '<div class="nav-header">LINEAGE ANALYSIS RESULTS</div>'
+
+NAV_MULTI_SELECTION = """<div class="nav-header">MULTI-OBJECT SELECTION</div>
+
+### 📥 Download Sample Template
+
+1. **Download** the template below
+2. **Fill in** your database objects (replace sample data with your actual objects)
+3. **Upload** the completed file to analyze lineage
+"""
+
+NAV_MULTI_RESULTS = '<div class="nav-header">MULTI-OBJECT ANALYSIS RESULTS</div>'
+
+FOOTER_HTML = """---
+
+<div style='text-align: center; color: #666; padding: 1rem; font-size: 0.9rem;'>
+    🔄 <strong>Snowflake Data Lineage Tool</strong> | 
+    Built with Streamlit and Snowpark | 
+    Powered by SNOWFLAKE.CORE.GET_LINEAGE
+</div>
+"""
+
+# =============================================================================
+# UTILITY FUNCTIONS FOR DATABASE/SCHEMA/OBJECT OPERATIONS
+# =============================================================================
+
+def _sql_to_arrow(session, sql: str, params: list = None):
+    """Run a query (with optional qmark bind parameters) on the connector cursor and collect its Arrow batches into one table"""
+    cursor = session.connection.cursor()
+    try:
+        cursor.execute(sql, params)
+        batches = list(cursor.fetch_arrow_batches())
+        if not batches:
+            return pa.table({col.name: pa.array([]) for col in cursor.description})
+        # Batches of one result may use different integer widths, so let Arrow promote them
+        return pa.concat_tables(batches, promote_options="permissive")
+    finally:
+        cursor.close()
+
+def _sql_to_pandas_arrow(session, sql: str, params: list = None):
+    """Run a query and convert its Arrow result to a DataFrame once"""
+    return _sql_to_arrow(session, sql, params).to_pandas(types_mapper=pd.ArrowDtype)
+
+def _to_csv_bytes(df: pd.DataFrame):
+    """Encode a DataFrame as CSV with Arrow's multi-threaded writer"""
+    csv_buffer = BytesIO()
+    pacsv.write_csv(
+        pa.Table.from_pandas(df, preserve_index=False),
+        csv_buffer,
+        write_options=pacsv.WriteOptions(quoting_style="needed")
+    )
+    return csv_buffer.getvalue()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_all_databases(_session):
+    """Get all available databases"""
+    try:
+        query = "SHOW DATABASES"
+        databases_df = _session.sql(query).to_pandas()
+        
+        # Match the name column case-insensitively, ignoring quotes; fall back to the first column
+        column_map = {col.strip('"').upper(): col for col in databases_df.columns}
+        name_column = column_map.get('NAME') or column_map.get('DATABASE_NAME') or next(iter(databases_df.columns), None)
+        if name_column is None:
+            return []
+        return sorted(databases_df[name_column].tolist())
+    except Exception as e:
+        st.error(f"Error getting databases: {str(e)}")
+        return []
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_all_schemas(_session, database):
+    """Get all schemas in a database"""
+    try:
+        query = f"SHOW SCHEMAS IN DATABASE {database}"
+        schemas_df = _session.sql(query).to_pandas()
+        
+        # Match the name column case-insensitively, ignoring quotes; fall back to the first column
+        column_map = {col.strip('"').upper(): col for col in schemas_df.columns}
+        name_column = column_map.get('NAME') or column_map.get('SCHEMA_NAME') or next(iter(schemas_df.columns), None)
+        if name_column is None:
+            return []
+        return sorted(schemas_df[name_column].tolist())
+    except Exception as e:
+        st.error(f"Error getting schemas from {database}: {str(e)}")
+        return []
+
+def _show_object_names(session, object_kind: str, database_name: str, schema_name: str):
+    """Get the names of all tables or views in a schema via SHOW TERSE"""
+    cursor = session.connection.cursor()
+    try:
+        cursor.execute(f'SHOW TERSE {object_kind}S IN SCHEMA "{database_name}"."{schema_name}"')
+        name_index = [col.name for col in cursor.description].index('name')
+        object_names = [row[name_index] for row in cursor.fetchall()]
+        return pd.DataFrame({'TABLE_NAME': object_names, 'OBJECT_TYPE': object_kind})
+    finally:
+        cursor.close()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_objects(_session, database_name: str, schema_name: str, object_type: str = "ALL"):
+    """Get list of tables, views, or all objects in a schema"""
+    try:
+        object_kinds = ["TABLE", "VIEW"] if object_type == "ALL" else [object_type]
+        
+        # SHOW TABLES and SHOW VIEWS are independent metadata calls, so run them side by side
+        with ThreadPoolExecutor(max_workers=len(object_kinds)) as executor:
+            object_frames = list(executor.map(
+                lambda object_kind: _show_object_names(_session, object_kind, database_name, schema_name),
+                object_kinds
+            ))
+        
+        return pd.concat(object_frames, ignore_index=True).sort_values('TABLE_NAME', ignore_index=True)
+    except Exception as e:
+        st.error(f"Error fetching objects: {e}")
+        return pd.DataFrame(columns=['TABLE_NAME', 'OBJECT_TYPE'])
+
+def get_object_type(session, db_name: str, schema_name: str, object_name: str):
+    """Determines if the given object is a TABLE or a VIEW from the cached schema listing"""
+    objects_df = get_objects(session, db_name, schema_name)
+    object_type = objects_df.loc[objects_df['TABLE_NAME'] == object_name, 'OBJECT_TYPE']
+    if not object_type.empty:
+        return object_type.iloc[0]
+    return None
+
+def get_object_types(session, db_name: str, objects: list):
+    """Determines TABLE or VIEW for many (schema, object) pairs of one database in a single query; query errors are raised to the caller"""
+    object_pairs = ", ".join(["(?, ?)"] * len(objects))
+    table_type_query = f"""
+    SELECT TABLE_SCHEMA, TABLE_NAME,
+           CASE WHEN TABLE_TYPE = 'BASE TABLE' THEN 'TABLE' ELSE TABLE_TYPE END AS OBJECT_TYPE
+    FROM IDENTIFIER(?)
+    WHERE (TABLE_SCHEMA, TABLE_NAME) IN ({object_pairs})
+    AND TABLE_TYPE IN ('BASE TABLE', 'VIEW')
+    """
+    params = [f"{db_name}.INFORMATION_SCHEMA.TABLES"]
+    for schema_name, object_name in objects:
+        params.extend([schema_name, object_name])
+    table_result_df = _sql_to_pandas_arrow(session, table_type_query, params)
+
+    return {
+        (db_name, row.TABLE_SCHEMA, row.TABLE_NAME): row.OBJECT_TYPE
+        for row in table_result_df.itertuples(index=False)
+    }
+
+# =============================================================================
+# LINEAGE ANALYSIS FUNCTIONS
+# =============================================================================
+
+# Every value is bound, so the query text is the same for all objects and both directions
+LINEAGE_QUERY = """
+    SELECT
+        DISTANCE,
+        SOURCE_OBJECT_DOMAIN,
+        SOURCE_OBJECT_DATABASE,
+        SOURCE_OBJECT_SCHEMA,
+        SOURCE_OBJECT_NAME,
+        TARGET_OBJECT_DOMAIN,
+        TARGET_OBJECT_DATABASE,
+        TARGET_OBJECT_SCHEMA,
+        TARGET_OBJECT_NAME
+    FROM TABLE (SNOWFLAKE.CORE.GET_LINEAGE(?, ?, ?, ?))
+"""
+
+# Objects per fused multi-object query, and how many of those queries run at once
+LINEAGE_BATCH_SIZE = 25
+LINEAGE_MAX_WORKERS = 10
+
+# Seconds a cached per-object lineage result is reused, and how many are kept (oldest evicted first)
+LINEAGE_CACHE_TTL = 600
+LINEAGE_CACHE_MAX_ENTRIES = 5000
+
+# Rows of the multi-object result shown in the records table before "Show all" is ticked
+RESULTS_PREVIEW_ROWS = 1000
+
+# Columns of the multi-object result, also used to shape it when no lineage was found
+MULTI_LINEAGE_COLUMNS = [
+    'QUERIED_OBJECT', 'LINEAGE_DIRECTION', 'DISTANCE',
+    'SOURCE_OBJECT_DOMAIN', 'SOURCE_OBJECT_DATABASE', 'SOURCE_OBJECT_SCHEMA', 'SOURCE_OBJECT_NAME',
+    'TARGET_OBJECT_DOMAIN', 'TARGET_OBJECT_DATABASE', 'TARGET_OBJECT_SCHEMA', 'TARGET_OBJECT_NAME'
+]
+
+# Repetitive string columns of the multi-object result, kept as pandas categoricals
+CATEGORICAL_LINEAGE_COLUMNS = (
+    'QUERIED_OBJECT', 'LINEAGE_DIRECTION',
+    'SOURCE_OBJECT_DOMAIN', 'SOURCE_OBJECT_DATABASE', 'SOURCE_OBJECT_SCHEMA', 'SOURCE_OBJECT_NAME',
+    'TARGET_OBJECT_DOMAIN', 'TARGET_OBJECT_DATABASE', 'TARGET_OBJECT_SCHEMA', 'TARGET_OBJECT_NAME'
+)
+
+# One UNION ALL branch of the multi-object query, tagged with the queried object and direction
+MULTI_LINEAGE_SELECT = """
+    SELECT
+        ? AS QUERIED_OBJECT,
+        ? AS LINEAGE_DIRECTION,
+        DISTANCE,
+        SOURCE_OBJECT_DOMAIN,
+        SOURCE_OBJECT_DATABASE,
+        SOURCE_OBJECT_SCHEMA,
+        SOURCE_OBJECT_NAME,
+        TARGET_OBJECT_DOMAIN,
+        TARGET_OBJECT_DATABASE,
+        TARGET_OBJECT_SCHEMA,
+        TARGET_OBJECT_NAME
+    FROM TABLE (SNOWFLAKE.CORE.GET_LINEAGE(?, ?, ?, ?))"""
+
+def get_lineage_for_single_object(session, object_full_name: str, max_distance: int, object_type: str = None):
+    """Retrieves lineage for a single Snowflake object using SNOWFLAKE.CORE.GET_LINEAGE"""
+    parts = object_full_name.strip().split('.')
+    
+    # Parse the object name
+    if len(parts) == 3:
+        db_name, schema_name, obj_name = parts[0].upper(), parts[1].upper(), parts[2].upper()
+    elif len(parts) == 2:
+        schema_name, obj_name = parts[0].upper(), parts[1].upper()
+        current_db = session.get_current_database()
+        if current_db:
+            db_name = current_db.upper()
+        else:
+            st.error("Could not determine current database. Please provide full 'DATABASE.SCHEMA.OBJECT_NAME'.")
+            return None, None, None
+    else:
+        st.error("Please enter object name in 'SCHEMA.OBJECT_NAME' or 'DATABASE.SCHEMA.OBJECT_NAME' format.")
+        return None, None, None
+
+    # Determine object type unless the caller already knows it
+    if object_type is None:
+        object_type = get_object_type(session, db_name, schema_name, obj_name)
+    if object_type is None:
+        st.error(f"Could not determine if '{object_full_name}' is a TABLE or VIEW, or object does not exist.")
+        return None, None, None
+
+    fully_qualified_object_name = f"{db_name}.{schema_name}.{obj_name}"
+
+    # Upstream and downstream are independent, so fetch them concurrently on separate cursors
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        upstream_future = executor.submit(
+            _sql_to_pandas_arrow, session, LINEAGE_QUERY,
+            [fully_qualified_object_name, object_type, 'UPSTREAM', max_distance]
+        )
+        downstream_future = executor.submit(
+            _sql_to_pandas_arrow, session, LINEAGE_QUERY,
+            [fully_qualified_object_name, object_type, 'DOWNSTREAM', max_distance]
+        )
+
+    lineage_results = []
+    for direction, future in (("upstream", upstream_future), ("downstream", downstream_future)):
+        try:
+            lineage_results.append(future.result())
+        except Exception as e:
+            st.error(f"Error fetching {direction} lineage: {e}")
+            lineage_results.append(None)
+    upstream_df, downstream_df = lineage_results
+
+    # Sorting is done client-side so Snowflake can stream unordered results
+    if upstream_df is not None:
+        upstream_df = upstream_df.sort_values(['DISTANCE', 'SOURCE_OBJECT_NAME'], ignore_index=True)
+    if downstream_df is not None:
+        downstream_df = downstream_df.sort_values(['DISTANCE', 'TARGET_OBJECT_NAME'], ignore_index=True)
+
+    if upstream_df is None or downstream_df is None:
+        st.info("Ensure you have ACCOUNTADMIN role or necessary privileges for SNOWFLAKE.CORE functions.")
+        if upstream_df is None and downstream_df is None:
+            return None, None, None
+    return upstream_df, downstream_df, object_type
+
+def _build_multi_lineage_query(lineage_targets: list, max_distance: int):
+    """Builds one UNION ALL query and its bind parameters over upstream and downstream lineage of (queried, fully qualified, type) targets"""
+    params = []
+    for queried_object, fully_qualified_object_name, object_type in lineage_targets:
+        for direction in ('UPSTREAM', 'DOWNSTREAM'):
+            params.extend([queried_object, direction, fully_qualified_object_name, object_type, direction, max_distance])
+    query = "\n    UNION ALL".join([MULTI_LINEAGE_SELECT] * (2 * len(lineage_targets))) + "\n"
+    return query, params
+
+def parse_object_names(object_names: list, current_db: str = None):
+    """Parses names into (queried, database, schema, object) tuples once, returning them with the names that failed and why"""
+    # Snowpark returns the current database as a quoted identifier ('"DB1"'), while parsed names are unquoted
+    if current_db and len(current_db) > 1 and current_db[0] == current_db[-1] == '"':
+        current_db = current_db[1:-1].replace('""', '"')
+    current_db = current_db.upper() if current_db else None
+    parsed_objects = {}
+    failed_objects = []
+    messages = []
+    for obj_name in object_names:
+        obj_name = obj_name.strip().upper()
+        parts = obj_name.split('.')
+        
+        # Keyed by the resolved object, so SCHEMA.OBJECT and DATABASE.SCHEMA.OBJECT spellings are queried once
+        if len(parts) == 3:
+            parsed_objects.setdefault(tuple(parts), (obj_name, parts[0], parts[1], parts[2]))
+        elif len(parts) == 2 and current_db:
+            parsed_objects.setdefault((current_db, parts[0], parts[1]), (obj_name, current_db, parts[0], parts[1]))
+        elif len(parts) == 2:
+            messages.append(f"Skipping '{obj_name}': Could not determine current database.")
+            failed_objects.append(obj_name)
+        else:
+            messages.append(f"Skipping '{obj_name}': Invalid format.")
+            failed_objects.append(obj_name)
+    return list(parsed_objects.values()), failed_objects, messages
+
+@st.cache_resource(show_spinner=False)
+def _lineage_cache():
+    """Process-wide lineage store shared by all sessions: a lock and an OrderedDict of (target, max_distance) -> (fetched at, table), oldest first"""
+    return threading.Lock(), OrderedDict()
+
+def _get_cached_lineage(lineage_targets: list, max_distance: int):
+    """Splits targets into a {target: table} dict of unexpired cached lineage and the list of targets still to fetch"""
+    cache_lock, lineage_cache = _lineage_cache()
+    now = time.monotonic()
+    cached_tables = {}
+    missing_targets = []
+    with cache_lock:
+        for target in lineage_targets:
+            cache_key = (target, max_distance)
+            cache_entry = lineage_cache.get(cache_key)
+            if cache_entry is not None and now - cache_entry[0] < LINEAGE_CACHE_TTL:
+                cached_tables[target] = cache_entry[1]
+            else:
+                lineage_cache.pop(cache_key, None)
+                missing_targets.append(target)
+    return cached_tables, missing_targets
+
+def _store_cached_lineage(lineage_tables: dict, max_distance: int):
+    """Stores freshly fetched {target: table} lineage, then evicts expired entries and the oldest beyond LINEAGE_CACHE_MAX_ENTRIES"""
+    cache_lock, lineage_cache = _lineage_cache()
+    fetched_at = time.monotonic()
+    with cache_lock:
+        for target, lineage_table in lineage_tables.items():
+            lineage_cache.pop((target, max_distance), None)
+            lineage_cache[(target, max_distance)] = (fetched_at, lineage_table)
+        # Entries are kept in fetch order, so expired and surplus ones are all at the front
+        while lineage_cache and (
+            len(lineage_cache) > LINEAGE_CACHE_MAX_ENTRIES
+            or fetched_at - next(iter(lineage_cache.values()))[0] >= LINEAGE_CACHE_TTL
+        ):
+            lineage_cache.popitem(last=False)
+
+def _clear_cached_lineage():
+    """Empties the process-wide lineage store"""
+    cache_lock, lineage_cache = _lineage_cache()
+    with cache_lock:
+        lineage_cache.clear()
+
+def _split_lineage_table(lineage_table, lineage_batch: list):
+    """Splits a fused lineage result into one table per target of the batch, using the QUERIED_OBJECT column"""
+    if lineage_table.num_rows == 0:
+        return {target: lineage_table for target in lineage_batch}
+    queried_objects = lineage_table['QUERIED_OBJECT']
+    return {
+        target: lineage_table.filter(pc.equal(queried_objects, target[0]))
+        for target in lineage_batch
+    }
+
+def _fetch_lineage_batch(session, lineage_batch: list, max_distance: int):
+    """Fetches lineage for a batch of targets in one fused query, retrying objects individually if it fails"""
+    # Runs in worker threads, so results are returned as {target: table} with (queried object, error) pairs
+    # rather than displayed or cached here
+    try:
+        lineage_table = _sql_to_arrow(session, *_build_multi_lineage_query(lineage_batch, max_distance))
+        return _split_lineage_table(lineage_table, lineage_batch), []
+    except Exception:
+        lineage_tables = {}
+        errors = []
+        for target in lineage_batch:
+            try:
+                lineage_tables[target] = _sql_to_arrow(session, *_build_multi_lineage_query([target], max_distance))
+            except Exception as e:
+                errors.append((target[0], e))
+        return lineage_tables, errors
+
+def get_lineage_for_multiple_objects(session, object_names: list, max_distance: int):
+    """Retrieves lineage for multiple Snowflake objects, returning the consolidated results, failed objects and warning messages"""
+    # Messages are returned and stored with the results, so they stay visible in the results column on later reruns
+    parsed_objects, failed_objects, messages = parse_object_names(object_names, session.get_current_database())
+
+    # Resolve object types with one INFORMATION_SCHEMA query per database
+    objects_by_db = {}
+    for _, db_name, schema_name, current_obj_name in parsed_objects:
+        objects_by_db.setdefault(db_name, []).append((schema_name, current_obj_name))
+    object_types = {}
+    for db_name, db_objects in objects_by_db.items():
+        try:
+            object_types.update(get_object_types(session, db_name, db_objects))
+        except Exception as e:
+            messages.append(f"Could not determine object types in {db_name}: {e}")
+
+    lineage_targets = []
+    for obj_name, db_name, schema_name, current_obj_name in parsed_objects:
+        object_type = object_types.get((db_name, schema_name, current_obj_name))
+        if object_type is None:
+            messages.append(f"Skipping '{obj_name}': Could not determine object type.")
+            failed_objects.append(obj_name)
+            continue
+        lineage_targets.append((obj_name, f"{db_name}.{schema_name}.{current_obj_name}", object_type))
+
+    if not lineage_targets:
+        return pd.DataFrame(columns=MULTI_LINEAGE_COLUMNS), failed_objects, messages
+
+    # Objects analyzed recently are served from the cache; only the rest are queried
+    target_tables, missing_targets = _get_cached_lineage(lineage_targets, max_distance)
+
+    # Fused queries of up to LINEAGE_BATCH_SIZE uncached objects run concurrently on separate cursors
+    lineage_batches = [
+        missing_targets[start:start + LINEAGE_BATCH_SIZE]
+        for start in range(0, len(missing_targets), LINEAGE_BATCH_SIZE)
+    ]
+    if lineage_batches:
+        with ThreadPoolExecutor(max_workers=min(LINEAGE_MAX_WORKERS, len(lineage_batches))) as executor:
+            batch_results = executor.map(
+                lambda lineage_batch: _fetch_lineage_batch(session, lineage_batch, max_distance),
+                lineage_batches
+            )
+            for batch_tables, batch_errors in batch_results:
+                # Failed objects are left out of the cache so they are retried next time
+                _store_cached_lineage(batch_tables, max_distance)
+                target_tables.update(batch_tables)
+                for queried_object, error in batch_errors:
+                    messages.append(f"Error fetching lineage for '{queried_object}': {error}")
+                    failed_objects.append(queried_object)
+
+    lineage_tables = [
+        target_tables[target] for target in lineage_targets
+        if target in target_tables and target_tables[target].num_rows > 0
+    ]
+    if not lineage_tables:
+        return pd.DataFrame(columns=MULTI_LINEAGE_COLUMNS), failed_objects, messages
+    combined_table = pa.concat_tables(lineage_tables, promote_options="permissive")
+
+    # Sort and convert to pandas once, after all Arrow data has been collected
+    combined_table = combined_table.sort_by([
+        ('QUERIED_OBJECT', 'ascending'), ('LINEAGE_DIRECTION', 'ascending'), ('DISTANCE', 'ascending')
+    ])
+    combined_df = combined_table.to_pandas(types_mapper=pd.ArrowDtype)
+    
+    # Low-cardinality name columns are stored as categoricals (integer codes plus a small dictionary)
+    for column in CATEGORICAL_LINEAGE_COLUMNS:
+        combined_df[column] = combined_df[column].astype('category')
+    return combined_df, failed_objects, messages
+
+def request_multi_analysis(object_names: list):
+    """Button callback that records the objects and distance to analyze for the rerun it triggers"""
+    if not object_names:
+        return
+    st.session_state['multi_request'] = {
+        'object_names': object_names,
+        'max_distance': st.session_state['multi_distance']
+    }
+
+def run_multi_analysis(object_names: list, max_distance: int):
+    """Runs the multi-object analysis and stores its results in session state"""
+    combined_df, failed_objects, messages = get_lineage_for_multiple_objects(session, object_names, max_distance)
+    st.session_state['multi_results'] = {
+        'object_names': object_names,
+        'combined_df': combined_df,
+        'failed_objects': failed_objects,
+        'messages': messages
+    }
+
+# =============================================================================
+# FILE HANDLING FUNCTIONS
+# =============================================================================
+
+# Columns of the upload template; OBJECT_TYPE is informational only
+REQUIRED_COLUMNS = ['DATABASE_NAME', 'SCHEMA_NAME', 'OBJECT_NAME']
+TEMPLATE_COLUMNS = ['DATABASE_NAME', 'SCHEMA_NAME', 'OBJECT_TYPE', 'OBJECT_NAME']
+XLSX_CHUNK_ROWS = 10_000
+
+# Example rows for the downloadable upload template
+SAMPLE_DF = pd.DataFrame({
+    'DATABASE_NAME': ['SNOWFLAKE_SAMPLE_DATA', 'SNOWFLAKE_SAMPLE_DATA'],
+    'SCHEMA_NAME': ['TPCH_SF1', 'TPCH_SF1'],
+    'OBJECT_TYPE': ['TABLE', 'VIEW'],
+    'OBJECT_NAME': ['CUSTOMER', 'CUSTOMER_VIEW']
+}, columns=TEMPLATE_COLUMNS)
+
+def _missing_required_columns(columns):
+    """Return the required columns absent from an uploaded file's header, in REQUIRED_COLUMNS order"""
+    present_columns = frozenset(columns)
+    return [col for col in REQUIRED_COLUMNS if col not in present_columns]
+
+def _object_names_from_frame(df: pd.DataFrame):
+    """Join the database, schema and object columns into DATABASE.SCHEMA.OBJECT names"""
+    return (
+        df['DATABASE_NAME'].astype(str) + '.' + df['SCHEMA_NAME'].astype(str) + '.' + df['OBJECT_NAME'].astype(str)
+    ).tolist()
+
+def read_object_names_csv(uploaded_file):
+    """Stream object names from an uploaded CSV with Arrow's CSV reader, returning them with any missing required columns and skipped row numbers"""
+    # The reader only parses the first block to build its schema, so this is a cheap header check
+    skip_rows = pacsv.ParseOptions(invalid_row_handler=lambda row: 'skip')
+    header = pacsv.open_csv(uploaded_file, parse_options=skip_rows).schema.names
+    missing_columns = _missing_required_columns(header)
+    if missing_columns:
+        return [], missing_columns, []
+    
+    # Rows with the wrong number of fields (e.g. from hand editing) are skipped and reported rather than failing the file
+    skipped_rows = []
+    def skip_invalid_row(row):
+        skipped_rows.append(row.number)
+        return 'skip'
+    
+    uploaded_file.seek(0)
+    reader = pacsv.open_csv(
+        uploaded_file,
+        parse_options=pacsv.ParseOptions(invalid_row_handler=skip_invalid_row),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=REQUIRED_COLUMNS,
+            column_types={col: pa.string() for col in REQUIRED_COLUMNS}
+        )
+    )
+    object_names = []
+    for batch in reader:
+        object_names.extend(pc.binary_join_element_wise(
+            *batch.columns, '.', null_handling='replace', null_replacement=''
+        ).to_pylist())
+    return object_names, [], sorted(row_number for row_number in skipped_rows if row_number is not None)
+
+def read_object_names_xlsx(uploaded_file):
+    """Stream object names from the first sheet of an uploaded .xlsx file, returning them with any missing required columns and skipped row numbers"""
+    workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[0]
+        # Files from other tools often have a missing or stale <dimension> tag, so size rows from the cells themselves
+        worksheet.reset_dimensions()
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        column_index = {name: index for index, name in enumerate(header)}
+        missing_columns = _missing_required_columns(header)
+        if missing_columns:
+            return [], missing_columns, []
+        
+        name_indexes = [column_index[col] for col in REQUIRED_COLUMNS]
+        object_names = []
+        skipped_rows = []
+        for row_number, row in enumerate(rows, start=2):
+            if all(value is None for value in row):
+                continue
+            # Rows can be shorter than the header when their trailing cells are empty
+            name_parts = [row[index] if index < len(row) else None for index in name_indexes]
+            if any(part is None or str(part).strip() == '' for part in name_parts):
+                skipped_rows.append(row_number)
+                continue
+            object_names.append('.'.join(str(part) for part in name_parts))
+        return object_names, [], skipped_rows
+    finally:
+        workbook.close()
+
+@st.cache_resource(show_spinner=False)
+def _template_excel_bytes():
+    """Build the sample Excel template once per process"""
+    return _to_xlsx_bytes(SAMPLE_DF, 'Lineage_Objects')
+
+@st.cache_data(ttl=600, max_entries=4, show_spinner=False)
+def _to_parquet_bytes(df: pd.DataFrame):
+    """Serialize a DataFrame to zstd-compressed Parquet bytes"""
+    parquet_buffer = BytesIO()
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), parquet_buffer, compression='zstd')
+    return parquet_buffer.getvalue()
+
+def _to_xlsx_bytes(df: pd.DataFrame, sheet_name: str):
+    """Write a DataFrame to xlsx bytes row by row using xlsxwriter's constant_memory mode"""
+    excel_buffer = BytesIO()
+    workbook = xlsxwriter.Workbook(excel_buffer, {'constant_memory': True})
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, df.columns.tolist(), workbook.add_format({'bold': True, 'border': 1}))
+    
+    # constant_memory only keeps the current row, so cells must be written in row order
+    # (pandas' ExcelWriter writes column by column and would lose data in this mode).
+    # Rows are converted to Python values one slice at a time to keep that copy small too.
+    for start in range(0, len(df), XLSX_CHUNK_ROWS):
+        chunk = df.iloc[start:start + XLSX_CHUNK_ROWS]
+        rows = chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None)
+        for row_index, row in enumerate(rows, start=start + 1):
+            worksheet.write_row(row_index, 0, row)
+    
+    # Get the data AFTER the workbook is closed
+    workbook.close()
+    return excel_buffer.getvalue()
+
+# =============================================================================
+# VISUALIZATION FUNCTIONS
+# =============================================================================
+
+# Spacing (in pixels) used by the layered fallback layout
+GRAPH_NODE_SPACING = 180
+GRAPH_LAYER_SPACING = 150
+
+# vis.js options: no physics, straight edges, and edges hidden while dragging or zooming
+GRAPH_OPTIONS = {
+    "physics": {"enabled": False},
+    "edges": {"smooth": False},
+    "interaction": {"hideEdgesOnDrag": True, "hideEdgesOnZoom": True, "tooltipDelay": 200}
+}
+
+def build_lineage_graph(upstream_df: pd.DataFrame, downstream_df: pd.DataFrame, object_name: str):
+    """Build a directed lineage graph, tagging each node with its layer relative to the analyzed object"""
+    graph = nx.DiGraph()
+    graph.add_node(object_name, layer=0)
+    
+    for lineage_df, direction in ((upstream_df, -1), (downstream_df, 1)):
+        if lineage_df is None or lineage_df.empty:
+            continue
+        for row in lineage_df.itertuples(index=False):
+            source = f"{row.SOURCE_OBJECT_DATABASE}.{row.SOURCE_OBJECT_SCHEMA}.{row.SOURCE_OBJECT_NAME}"
+            target = f"{row.TARGET_OBJECT_DATABASE}.{row.TARGET_OBJECT_SCHEMA}.{row.TARGET_OBJECT_NAME}"
+            graph.add_edge(source, target)
+            
+            # Upstream sources sit above the object, downstream targets below it
+            node = source if direction < 0 else target
+            layer = direction * int(row.DISTANCE)
+            current_layer = graph.nodes[node].get('layer')
+            if current_layer is None or abs(layer) < abs(current_layer):
+                graph.nodes[node]['layer'] = layer
+    
+    for node in graph.nodes:
+        graph.nodes[node].setdefault('layer', 0)
+    return graph
+
+def compute_lineage_layout(graph: nx.DiGraph):
+    """Compute static node coordinates, preferring Graphviz 'dot' and falling back to a layered layout"""
+    try:
+        positions = nx.nx_agraph.graphviz_layout(graph, prog='dot')
+        # Graphviz y grows upwards while vis.js y grows downwards
+        return {node: (x, -y) for node, (x, y) in positions.items()}
+    except (ImportError, OSError, ValueError):
+        # pygraphviz missing, or installed but unable to run 'dot'
+        layers = {}
+        for node, layer in graph.nodes(data='layer'):
+            layers.setdefault(layer, []).append(node)
+        return {
+            node: ((index - (len(nodes) - 1) / 2) * GRAPH_NODE_SPACING, layer * GRAPH_LAYER_SPACING)
+            for layer, nodes in layers.items()
+            for index, node in enumerate(sorted(nodes))
+        }
+
+def display_lineage_graph(upstream_df: pd.DataFrame, downstream_df: pd.DataFrame, object_name: str):
+    """Render the lineage graph with PyVis using precomputed coordinates and physics disabled"""
+    graph = build_lineage_graph(upstream_df, downstream_df, object_name)
+    positions = compute_lineage_layout(graph)
+    
+    net = Network(height="550px", width="100%", directed=True, cdn_resources="in_line")
+    for node, layer in graph.nodes(data='layer'):
+        if node == object_name:
+            color = "#ff6b6b"
+        elif layer < 0:
+            color = "#2a5298"
+        else:
+            color = "#28a745"
+        x, y = positions[node]
+        net.add_node(node, label=node.split('.')[-1], title=node, color=color, x=x, y=y, physics=False)
+    for source, target in graph.edges:
+        net.add_edge(source, target)
+    # set_options replaces PyVis' whole options object, so it carries the physics and edge settings too
+    net.set_options(json.dumps(GRAPH_OPTIONS))
+    
+    components.html(net.generate_html(), height=570)
+
+@st.cache_data(ttl=600, max_entries=4, show_spinner=False)
+def _build_lineage_xlsx(df: pd.DataFrame):
+    """Build the multi-object results workbook, cached per result"""
+    return _to_xlsx_bytes(df, 'Lineage_Analysis')
+
+@st.fragment
+def display_excel_download(df: pd.DataFrame):
+    """Build the Excel workbook only on request; as a fragment, the click reruns just this block"""
+    if st.button("📊 Prepare Excel", key="prepare_excel"):
+        st.download_button("📊 Download Excel", _build_lineage_xlsx(df), "multi_object_lineage.xlsx",
+                           "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+def display_lineage_summary(upstream_df: pd.DataFrame, downstream_df: pd.DataFrame):
+    """Display summary statistics for lineage analysis"""
+    # One aggregation pass per direction for unique objects and max distance
+    upstream_stats = (upstream_df.agg({'SOURCE_OBJECT_NAME': 'nunique', 'DISTANCE': 'max'})
+                      if not upstream_df.empty else {'SOURCE_OBJECT_NAME': 0, 'DISTANCE': 0})
+    downstream_stats = (downstream_df.agg({'TARGET_OBJECT_NAME': 'nunique', 'DISTANCE': 'max'})
+                        if not downstream_df.empty else {'TARGET_OBJECT_NAME': 0, 'DISTANCE': 0})
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.metric("🔼 Upstream Objects", upstream_stats['SOURCE_OBJECT_NAME'])
+    
+    with col2:
+        st.metric("🔽 Downstream Objects", downstream_stats['TARGET_OBJECT_NAME'])
+    
+    with col3:
+        st.metric("📏 Max Upstream Distance", upstream_stats['DISTANCE'])
+    
+    with col4:
+        st.metric("📏 Max Downstream Distance", downstream_stats['DISTANCE'])
+
+# =============================================================================
+# STREAMLIT UI CONFIGURATION
+# =============================================================================
+
+st.set_page_config(
+    page_title="Snowflake Data Lineage Tool", 
+    layout="wide", 
+    initial_sidebar_state="expanded",
+    page_icon="🔄"
+)
+
+# Custom CSS for clean, professional styling
+st.markdown(CSS_STYLE, unsafe_allow_html=True)
 
 # =============================================================================
 # MAIN APPLICATION UI
 # =============================================================================
 
 # Page header
-st.markdown("# Snowflake Data Lineage Tool")
-st.markdown('<p class="subtitle"></p>', 
-           unsafe_allow_html=True)
+st.markdown(PAGE_HEADER, unsafe_allow_html=True)
 
 # Create main tabs
 tab1, tab2 = st.tabs(["🎯 Single Object Lineage", "📊 Multi-Object Analysis"])
@@ -565,17 +951,30 @@ with tab1:
     col_input, col_output = st.columns([3, 7], gap="large")
     
     with col_input:
-        st.markdown('<div class="nav-header">OBJECT SELECTION</div>', unsafe_allow_html=True)
-        st.markdown("### 🎯Select Object Details")
+        st.markdown(NAV_SINGLE_SELECTION, unsafe_allow_html=True)
         
+        if st.button("🔄 Refresh Metadata", use_container_width=True, key="refresh_metadata"):
+            st.cache_data.clear()
+            _clear_cached_lineage()
+            st.session_state.pop('databases', None)
+            st.session_state.pop('schemas_by_db', None)
+        
+        # Databases and schemas are loaded once per session and reused across reruns
+        if 'databases' not in st.session_state:
+            st.session_state['databases'] = get_all_databases(session)
+        if 'schemas_by_db' not in st.session_state:
+            st.session_state['schemas_by_db'] = {}
         
         # Database selection
-        available_databases = get_all_databases(session)
+        available_databases = st.session_state['databases']
         selected_db = st.selectbox("Database Name:", [""] + available_databases, key="single_db")
         
         # Schema selection
         if selected_db:
-            available_schemas = get_all_schemas(session, selected_db)
+            schemas_by_db = st.session_state['schemas_by_db']
+            if selected_db not in schemas_by_db:
+                schemas_by_db[selected_db] = get_all_schemas(session, selected_db)
+            available_schemas = schemas_by_db[selected_db]
             selected_schema = st.selectbox("Schema Name:", [""] + available_schemas, key="single_schema")
         else:
             selected_schema = ""
@@ -585,15 +984,20 @@ with tab1:
         if selected_db and selected_schema:
             objects_df = get_objects(session, selected_db, selected_schema)
             if not objects_df.empty:
-                # Create formatted options
-                object_options = [""] + [f"{row['TABLE_NAME']} ({row['OBJECT_TYPE']})" 
-                                       for _, row in objects_df.iterrows()]
-                selected_object_display = st.selectbox("Select Object Name:", object_options, key="single_object")
+                st.session_state['object_types'] = objects_df.set_index('TABLE_NAME')['OBJECT_TYPE'].to_dict()
                 
-                if selected_object_display and selected_object_display != "":
-                    selected_object = selected_object_display.split(" (")[0]
-                else:
-                    selected_object = ""
+                # Create formatted options; the selectbox returns the plain object name
+                object_names = objects_df['TABLE_NAME'].tolist()
+                object_labels = dict(zip(
+                    object_names,
+                    (objects_df['TABLE_NAME'] + " (" + objects_df['OBJECT_TYPE'] + ")").tolist()
+                ))
+                selected_object = st.selectbox(
+                    "Select Object Name:",
+                    [""] + object_names,
+                    format_func=lambda name: object_labels.get(name, name),
+                    key="single_object"
+                )
             else:
                 st.warning(f"⚠️ No tables or views found in {selected_db}.{selected_schema}")
                 selected_object = ""
@@ -614,12 +1018,13 @@ with tab1:
             object_full_name = f"{selected_db}.{selected_schema}.{selected_object}"
             st.session_state['single_analysis'] = {
                 'object_name': object_full_name,
-                'max_distance': max_distance
+                'max_distance': max_distance,
+                'object_type': st.session_state.get('object_types', {}).get(selected_object)
             }
 
     
     with col_output:
-        st.markdown('<div class="nav-header">LINEAGE ANALYSIS RESULTS</div>', unsafe_allow_html=True)
+        st.markdown(NAV_SINGLE_RESULTS, unsafe_allow_html=True)
         
         # Check if analysis should run
         if 'single_analysis' in st.session_state and st.session_state['single_analysis'] is not None:
@@ -628,7 +1033,9 @@ with tab1:
             max_dist = analysis_params['max_distance']
             
             with st.spinner(f"🔄 Analyzing lineage for {object_name}..."):
-                upstream_df, downstream_df, object_type = get_lineage_for_single_object(session, object_name, max_dist)
+                upstream_df, downstream_df, object_type = get_lineage_for_single_object(
+                    session, object_name, max_dist, object_type=analysis_params.get('object_type')
+                )
                 
                 if upstream_df is not None or downstream_df is not None:
                     st.success(f"✅ Successfully analyzed lineage for **{object_name}** ({object_type})")
@@ -640,9 +1047,7 @@ with tab1:
                     )
                     
                     # Create tabs for different views
-                    tab_upstream, tab_downstream = st.tabs(["🔼 Upstream", "🔽 Downstream"])
-                    
-                    
+                    tab_upstream, tab_downstream, tab_graph = st.tabs(["🔼 Upstream", "🔽 Downstream", "🕸️ Lineage Graph"])
                     
                     with tab_upstream:
                         if upstream_df is not None and not upstream_df.empty:
@@ -650,7 +1055,7 @@ with tab1:
                             st.dataframe(upstream_df, use_container_width=True, hide_index=True)
                             
                             # Download option
-                            csv = upstream_df.to_csv(index=False)
+                            csv = _to_csv_bytes(upstream_df)
                             st.download_button("📥 Download Upstream Data", csv, f"upstream_lineage_{object_name.replace('.', '_')}.csv", "text/csv")
                         else:
                             st.info("🔍 No upstream dependencies found")
@@ -661,10 +1066,17 @@ with tab1:
                             st.dataframe(downstream_df, use_container_width=True, hide_index=True)
                             
                             # Download option
-                            csv = downstream_df.to_csv(index=False)
+                            csv = _to_csv_bytes(downstream_df)
                             st.download_button("📥 Download Downstream Data", csv, f"downstream_lineage_{object_name.replace('.', '_')}.csv", "text/csv")
                         else:
                             st.info("🔍 No downstream dependencies found")
+                    
+                    with tab_graph:
+                        if (upstream_df is not None and not upstream_df.empty) or (downstream_df is not None and not downstream_df.empty):
+                            st.markdown("### 🕸️ Lineage Graph")
+                            display_lineage_graph(upstream_df, downstream_df, object_name)
+                        else:
+                            st.info("🔍 No lineage to visualize")
                 else:
                     st.error("❌ Failed to analyze lineage. Please check the object name and your permissions.")
                     
@@ -683,47 +1095,12 @@ with tab2:
     col_input2, col_output2 = st.columns([3, 7], gap="large")
     
     with col_input2:
-        st.markdown('<div class="nav-header">MULTI-OBJECT SELECTION</div>', unsafe_allow_html=True)
-        
-        # Sample file download section
-        st.markdown("### 📥 Download Sample Template")
-        st.markdown("""
-        1. **Download** the template below
-        2. **Fill in** your database objects (replace sample data with your actual objects)
-        3. **Upload** the completed file to analyze lineage
-        """)
+        # Header and sample file download instructions
+        st.markdown(NAV_MULTI_SELECTION, unsafe_allow_html=True)
         
-        # Create sample data
-        sample_data = {
-            'DATABASE_NAME': [
-                'SNOWFLAKE_SAMPLE_DATA', 
-                'SNOWFLAKE_SAMPLE_DATA'
-            ],
-            'SCHEMA_NAME': [
-                'TPCH_SF1', 
-                'TPCH_SF1'
-            ],
-            'OBJECT_TYPE': [
-                'TABLE', 
-                'VIEW'
-            ],
-            'OBJECT_NAME': [
-                'CUSTOMER', 
-                'CUSTOMER_VIEW'
-            ]
-        }
-        sample_df = pd.DataFrame(sample_data)
-        
-      
         # Excel template download
-        excel_buffer = BytesIO()
         try:
-            with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-                sample_df.to_excel(writer, sheet_name='Lineage_Objects', index=False)
-            
-            # Get the data AFTER the writer is closed
-            excel_buffer.seek(0)
-            excel_data = excel_buffer.getvalue()
+            excel_data = _template_excel_bytes()
             
             st.download_button(
                 label="📊 Download Excel Template",
@@ -746,32 +1123,34 @@ with tab2:
         )
         
         object_names_from_file = []
+        skipped_rows = []
         
         if uploaded_file is not None:
             try:
                 # Read file based on extension
                 if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file)
-                else:  # Excel files
+                    object_names_from_file, missing_columns, skipped_rows = read_object_names_csv(uploaded_file)
+                elif uploaded_file.name.endswith('.xlsx'):
+                    object_names_from_file, missing_columns, skipped_rows = read_object_names_xlsx(uploaded_file)
+                else:  # Legacy .xls files are not readable by openpyxl
                     df = pd.read_excel(uploaded_file)
-                
-                # Validate required columns
-                required_columns = ['DATABASE_NAME', 'SCHEMA_NAME', 'OBJECT_NAME']
-                missing_columns = [col for col in required_columns if col not in df.columns]
+                    missing_columns = _missing_required_columns(df.columns)
+                    object_names_from_file = [] if missing_columns else _object_names_from_frame(df)
                 
                 if missing_columns:
                     st.error(f"❌ Missing required columns: {', '.join(missing_columns)}")
                     st.info("Required columns: DATABASE_NAME, SCHEMA_NAME, OBJECT_NAME")
                 else:
-                    st.success(f"✅ File uploaded successfully! Found {len(df)} objects")
-                   
-                    
-                    # Create object names list
-                    object_names_from_file = []
-                    for _, row in df.iterrows():
-                        object_name = f"{row['DATABASE_NAME']}.{row['SCHEMA_NAME']}.{row['OBJECT_NAME']}"
-                        object_names_from_file.append(object_name)
+                    st.success(f"✅ File uploaded successfully! Found {len(object_names_from_file)} objects")
+                    if skipped_rows:
+                        st.warning(f"⚠️ Skipped {len(skipped_rows)} malformed or incomplete rows at lines: "
+                                   f"{', '.join(map(str, skipped_rows[:20]))}{' ...' if len(skipped_rows) > 20 else ''}")
                     
+                    # Lineage only depends on the normalized object name, so query each name once (order preserved)
+                    row_count = len(object_names_from_file)
+                    object_names_from_file = list(dict.fromkeys(name.strip().upper() for name in object_names_from_file))
+                    if len(object_names_from_file) < row_count:
+                        st.info(f"Deduplicated to {len(object_names_from_file)} unique objects")
                     
             except Exception as e:
                 st.error(f"❌ Error reading file: {str(e)}")
@@ -780,131 +1159,121 @@ with tab2:
         
         # Analysis parameters
         st.markdown("### ⚙️ Analysis Parameters")
-        multi_max_distance = st.number_input("Maximum Distance:", min_value=1, max_value=5, value=1, 
+        st.number_input("Maximum Distance:", min_value=1, max_value=5, value=1, 
                                            help="Maximum lineage distance for each object", key="multi_distance")
         
-        # Action button
-        analyze_multi = st.button("🚀 Analyze Objects", type="primary", use_container_width=True, key="analyze_multi")
+        # Action button; the callback records the request, which the same rerun analyzes in the results column
+        analyze_multi = st.button(
+            "🚀 Analyze Objects", type="primary", use_container_width=True, key="analyze_multi",
+            on_click=request_multi_analysis, args=(object_names_from_file,)
+        )
         
-        if analyze_multi:
-            # Determine which source to use
-            if object_names_from_file:
-                # Use file upload
-                st.session_state['multi_analysis'] = {
-                    'object_names': object_names_from_file,
-                    'max_distance': multi_max_distance,
-                    'source': 'file'
-                }
-            elif object_list_input.strip():
-                # Use manual input
-                object_names = [name.strip() for name in object_list_input.strip().split('\n') if name.strip()]
-                if object_names:
-                    st.session_state['multi_analysis'] = {
-                        'object_names': object_names,
-                        'max_distance': multi_max_distance,
-                        'source': 'manual'
-                    }
-            else:
-                st.warning("⚠️ Please either upload a file or enter object names manually")
+        if analyze_multi and not object_names_from_file:
+            st.warning("⚠️ Please upload a file with the objects to analyze")
         
     
     with col_output2:
-        st.markdown('<div class="nav-header">MULTI-OBJECT ANALYSIS RESULTS</div>', unsafe_allow_html=True)
+        st.markdown(NAV_MULTI_RESULTS, unsafe_allow_html=True)
         
-        # Check if analysis should run
-        if 'multi_analysis' in st.session_state and st.session_state['multi_analysis'] is not None:
-            analysis_params = st.session_state['multi_analysis']
-            object_names = analysis_params['object_names']
-            max_dist = analysis_params['max_distance']
+        # Run a requested analysis here, so its spinner stays in this column for the whole run
+        multi_request = st.session_state.pop('multi_request', None)
+        if multi_request is not None:
+            with st.spinner(f"🔄 Analyzing lineage for {len(multi_request['object_names'])} objects..."):
+                run_multi_analysis(multi_request['object_names'], multi_request['max_distance'])
+        
+        # Render the stored results
+        multi_results = st.session_state.get('multi_results')
+        if multi_results is not None:
+            object_names = multi_results['object_names']
+            combined_df = multi_results['combined_df']
+            failed_objects = multi_results['failed_objects']
             
             st.markdown(f"**📋 Analysis Summary:** {len(object_names)} objects selected")
             
-            with st.spinner(f"🔄 Analyzing lineage for {len(object_names)} objects..."):
-                combined_df, failed_objects = get_lineage_for_multiple_objects(session, object_names, max_dist)
+            for message in multi_results['messages']:
+                st.warning(message)
+            
+            if not combined_df.empty or failed_objects:
+                # Success/failure summary
+                success_count = len(object_names) - len(failed_objects)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("✅ Successful", success_count)
+                with col2:
+                    st.metric("❌ Failed", len(failed_objects))
+                with col3:
+                    st.metric("📊 Total Lineage Records", len(combined_df))
                 
-                if not combined_df.empty or failed_objects:
-                    # Success/failure summary
-                    success_count = len(object_names) - len(failed_objects)
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("✅ Successful", success_count)
-                    with col2:
-                        st.metric("❌ Failed", len(failed_objects))
-                    with col3:
-                        st.metric("📊 Total Lineage Records", len(combined_df))
-                    
-                    if failed_objects:
-                        st.warning(f"⚠️ Failed to process: {', '.join(failed_objects)}")
+                if failed_objects:
+                    st.warning(f"⚠️ Failed to process: {', '.join(failed_objects)}")
+                
+                if not combined_df.empty:
+                    # Create tabs for different views
+                    tab_summary, tab_details = st.tabs(["📈 Summary", "📋 All Records"])
                     
-                    if not combined_df.empty:
-                        # Create tabs for different views
-                        tab_summary, tab_details = st.tabs(["📈 Summary", "📋 All Records"])
+                    with tab_summary:
+                        st.markdown("### 📈 Lineage Summary")
                         
-                        with tab_summary:
-                            st.markdown("### 📈 Lineage Summary")
-                            
-                            # Summary statistics
-                            upstream_count = len(combined_df[combined_df['LINEAGE_DIRECTION'] == 'UPSTREAM'])
-                            downstream_count = len(combined_df[combined_df['LINEAGE_DIRECTION'] == 'DOWNSTREAM'])
-                            
-                            col1, col2, col3, col4 = st.columns(4)
-                            with col1:
-                                st.metric("🔼 Upstream Records", upstream_count)
-                            with col2:
-                                st.metric("🔽 Downstream Records", downstream_count)
-                            with col3:
-                                unique_sources = combined_df['SOURCE_OBJECT_NAME'].nunique()
-                                st.metric("📤 Unique Sources", unique_sources)
-                            with col4:
-                                unique_targets = combined_df['TARGET_OBJECT_NAME'].nunique()
-                                st.metric("📥 Unique Targets", unique_targets)
-                            
-                            # Object-level summary
-                            st.markdown("#### 🎯 Per-Object Summary")
-                            object_summary = combined_df.groupby(['QUERIED_OBJECT', 'LINEAGE_DIRECTION']).size().unstack(fill_value=0)
-                            object_summary['Total'] = object_summary.sum(axis=1)
-                            st.dataframe(object_summary, use_container_width=True)
-                        
-                        with tab_details:
-                            st.markdown("### 📋 Detailed Lineage Records")
-                            st.dataframe(combined_df, use_container_width=True, hide_index=True)
-                            
-                            from io import BytesIO
-                            output = BytesIO()
-                            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                                combined_df.to_excel(writer, sheet_name='Lineage_Analysis', index=False)
-                            excel_data = output.getvalue()
-                            st.download_button("📊 Download Excel", excel_data, "multi_object_lineage.xlsx", 
-                                             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                        # Summary statistics: one value_counts pass and one aggregation pass
+                        direction_counts = combined_df['LINEAGE_DIRECTION'].value_counts()
+                        upstream_count = int(direction_counts.get('UPSTREAM', 0))
+                        downstream_count = int(direction_counts.get('DOWNSTREAM', 0))
+                        unique_counts = combined_df.agg({'SOURCE_OBJECT_NAME': 'nunique', 'TARGET_OBJECT_NAME': 'nunique'})
                         
+                        col1, col2, col3, col4 = st.columns(4)
+                        with col1:
+                            st.metric("🔼 Upstream Records", upstream_count)
+                        with col2:
+                            st.metric("🔽 Downstream Records", downstream_count)
+                        with col3:
+                            st.metric("📤 Unique Sources", int(unique_counts['SOURCE_OBJECT_NAME']))
+                        with col4:
+                            st.metric("📥 Unique Targets", int(unique_counts['TARGET_OBJECT_NAME']))
                         
+                        # Object-level summary
+                        st.markdown("#### 🎯 Per-Object Summary")
+                        object_summary = pd.crosstab(combined_df['QUERIED_OBJECT'], combined_df['LINEAGE_DIRECTION'])
+                        object_summary['Total'] = object_summary.to_numpy().sum(axis=1)
+                        st.dataframe(object_summary, use_container_width=True)
+                    
+                    with tab_details:
+                        st.markdown("### 📋 Detailed Lineage Records")
+                        # Only a preview is sent to the browser unless the user asks for every row
+                        if len(combined_df) > RESULTS_PREVIEW_ROWS and not st.checkbox(
+                            f"Show all {len(combined_df):,} rows", key="multi_show_all_rows"
+                        ):
+                            # A sliced categorical keeps every category, which would still be sent as the Arrow dictionary
+                            preview_df = combined_df.head(RESULTS_PREVIEW_ROWS)
+                            preview_df = preview_df.assign(**{
+                                column: preview_df[column].cat.remove_unused_categories()
+                                for column in CATEGORICAL_LINEAGE_COLUMNS
+                            })
+                            st.dataframe(preview_df, use_container_width=True, hide_index=True)
+                            st.caption(f"Showing the first {RESULTS_PREVIEW_ROWS:,} rows. Downloads include all records.")
+                        else:
+                            st.dataframe(combined_df, use_container_width=True, hide_index=True)
                         
-                    else:
-                        st.warning("⚠️ No lineage data found for the analyzed objects")
+                        display_excel_download(combined_df)
+                        st.download_button("🗜️ Download Parquet", _to_parquet_bytes(combined_df),
+                                         "multi_object_lineage.parquet", "application/vnd.apache.parquet",
+                                         help="Compact columnar format, much faster than Excel for large results")
+                    
+                    
+                    
                 else:
-                    st.error("❌ Failed to analyze lineage for any of the specified objects")
-            
-            # Clear the analysis state
-            st.session_state['multi_analysis'] = None
+                    st.warning("⚠️ No lineage data found for the analyzed objects")
+            else:
+                st.error("❌ Failed to analyze lineage for any of the specified objects")
         else:
             st.info("👈 **Get Started:** Enter object names and click 'Analyze Multiple Objects' to view results here.")
-        
-        st.markdown('</div>', unsafe_allow_html=True)
 
 # =============================================================================
 # FOOTER
 # =============================================================================
-st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: #666; padding: 1rem; font-size: 0.9rem;'>
-    🔄 <strong>Snowflake Data Lineage Tool</strong> | 
-    Built with Streamlit and Snowpark | 
-    Powered by SNOWFLAKE.CORE.GET_LINEAGE
-</div>
-""", unsafe_allow_html=True)
+st.markdown(FOOTER_HTML, unsafe_allow_html=True)
 
 # Initialize session state variables if not present
 if 'single_analysis' not in st.session_state:
     st.session_state['single_analysis'] = None
-if 'multi_analysis' not in st.session_state:
-    st.session_state['multi_analysis'] = None
+if 'multi_results' not in st.session_state:
+    st.session_state['multi_results'] = None